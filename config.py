@@ -1,8 +1,9 @@
 # config.py
 
 import os
+from functools import lru_cache
 from typing import Optional
-from pydantic import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -14,11 +15,31 @@ class Settings(BaseSettings):
     neo4j_password: str = "password"  # Should be overridden in production
     neo4j_database: str = "neo4j"
     
+    # Neo4j Connection Pool
+    neo4j_pool_size: int = 50
+    neo4j_connection_acquisition_timeout: float = 10.0
+    neo4j_max_connection_lifetime: int = 3600
+    
+    # Rows returned by run_cypher_query before truncating (use /mcp/stream for more)
+    cypher_max_results: int = 1000
+    
+    # Read-only query result cache, per worker process (size 0 disables it)
+    query_cache_size: int = 512
+    query_cache_ttl: float = 30.0
+    
     # Server Configuration
     host: str = "0.0.0.0"
     port: int = 8000
+    workers: int = os.cpu_count() or 1
     debug: bool = False
     
+    # Response Compression
+    gzip_minimum_size: int = 1024
+    gzip_compresslevel: int = 5
+    
+    # Health Checks
+    health_cache_ttl: float = 5.0
+    
     # Logging
     log_level: str = "INFO"
     
@@ -26,10 +47,10 @@ class Settings(BaseSettings):
     secret_key: str = "your-secret-key-here-change-in-production"
     access_token_expire_minutes: int = 30
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
 
 
-# Global settings instance
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsing the environment only once."""
+    return Settings()
@@ -1,10 +1,18 @@
 # main.py
 
 import logging
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+import uvicorn
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from mcp.router import router
-from config import settings
+from mcp.neo4j_client import Neo4jClient
+from mcp.health_interceptor import HealthCheckInterceptor
+from config import get_settings
+
+settings = get_settings()
 
 # Configure logging
 logging.basicConfig(
@@ -12,14 +20,27 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 
-app = FastAPI(
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Give each worker its own Neo4j driver, opened inside its event loop."""
+    client = Neo4jClient()
+    await client.connect()
+    app.state.neo4j = client
+    try:
+        yield
+    finally:
+        await client.close()
+
+fastapi_app = FastAPI(
     title="MCP Server with Neo4j Support",
     description="Model Context Protocol server for Neo4j graph operations",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
-app.add_middleware(
+fastapi_app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Configure appropriately for production
     allow_credentials=True,
@@ -27,22 +48,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (e.g. Cypher result sets); health probes are
+# answered by the interceptor below and never reach this middleware
+fastapi_app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.gzip_minimum_size,
+    compresslevel=settings.gzip_compresslevel,
+)
+
 # Include routers
-app.include_router(router, prefix="/api/v1")
+fastapi_app.include_router(router, prefix="/api/v1")
 
-@app.get("/")
-async def root():
-    """Health check endpoint."""
-    return {"message": "MCP Server with Neo4j Support", "status": "healthy"}
+# Health probes on "/" and "/health" are answered here, ahead of the
+# middleware stack; uvicorn serves this wrapper as "main:app".
+app = HealthCheckInterceptor(
+    fastapi_app,
+    root_payload={"message": "MCP Server with Neo4j Support", "status": "healthy"},
+    ttl=settings.health_cache_ttl,
+)
 
-@app.get("/health")
-async def health_check():
-    """Detailed health check including Neo4j connection."""
-    try:
-        from mcp.neo4j_client import neo4j_client
-        # Test Neo4j connection
-        with neo4j_client.driver.session() as session:
-            session.run("RETURN 1")
-        return {"status": "healthy", "neo4j": "connected"}
-    except Exception as e:
-        return {"status": "unhealthy", "neo4j": "disconnected", "error": str(e)}
\ No newline at end of file
+if __name__ == "__main__":
+    uvicorn.run(
+        "main:app",
+        host=settings.host,
+        port=settings.port,
+        loop="auto",  # uvloop where installed (not on Windows)
+        http="httptools",
+        workers=settings.workers,
+        log_level=settings.log_level.lower()
+    )
\ No newline at end of file
@@ -0,0 +1,72 @@
+# mcp/health_interceptor.py
+
+import asyncio
+import time
+from typing import Any, Dict
+
+import orjson
+
+HEALTH_PATHS = ("/", "/health")
+
+
+class HealthCheckInterceptor:
+    """
+    Pure ASGI wrapper that answers health probes before the FastAPI stack.
+
+    Probes to ``/`` and ``/health`` skip CORS, routing and validation. The
+    Neo4j probe result behind ``/health`` is cached for ``ttl`` seconds so
+    frequent liveness/readiness checks do not each borrow a pooled connection.
+    The Neo4j client is read from the wrapped app's ``state.neo4j``.
+    All other traffic is delegated to the wrapped application unchanged.
+    """
+
+    def __init__(self, app, root_payload: Dict[str, Any], ttl: float = 5.0):
+        self.app = app
+        self.ttl = ttl
+        self._root_body = orjson.dumps(root_payload)
+        self._health_body = b""
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in HEALTH_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] != "GET":
+            await self._send(send, 405, b'{"detail":"Method Not Allowed"}', [(b"allow", b"GET")])
+            return
+
+        if scope["path"] == "/":
+            body = self._root_body
+        else:
+            body = await self._get_health_body()
+        await self._send(send, 200, body)
+
+    async def _get_health_body(self) -> bytes:
+        """Return the cached Neo4j health payload, re-probing once the TTL expires."""
+        if time.monotonic() - self._checked_at >= self.ttl:
+            async with self._lock:
+                # Another probe may have refreshed the cache while we waited
+                if time.monotonic() - self._checked_at >= self.ttl:
+                    self._health_body = orjson.dumps(await self._probe_neo4j())
+                    self._checked_at = time.monotonic()
+        return self._health_body
+
+    async def _probe_neo4j(self) -> Dict[str, Any]:
+        """Detailed health check including Neo4j connection."""
+        try:
+            await self.app.state.neo4j.driver.verify_connectivity()
+            return {"status": "healthy", "neo4j": "connected"}
+        except Exception as e:
+            return {"status": "unhealthy", "neo4j": "disconnected", "error": str(e)}
+
+    @staticmethod
+    async def _send(send, status: int, body: bytes, extra_headers=()):
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *extra_headers,
+        ]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -1,108 +1,226 @@
 # mcp/neo4j_client.py
 
 import logging
-from typing import Dict, List, Any, Optional
-from neo4j import GraphDatabase, Driver
-from config import settings
+import re
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
+from neo4j import (
+    READ_ACCESS,
+    WRITE_ACCESS,
+    AsyncDriver,
+    AsyncGraphDatabase,
+    AsyncResult,
+    RoutingControl,
+)
+from config import get_settings
+from mcp.query_cache import QueryResultCache
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Queries must start with a read clause and contain no write clause to be
+# routed to readers; anything else is treated as a write.
+_READ_QUERY_PREFIX = re.compile(r"^\s*(MATCH|OPTIONAL\s+MATCH|WITH|UNWIND|RETURN|SHOW)\b", re.IGNORECASE)
+_WRITE_CLAUSE = re.compile(r"\b(CREATE|MERGE|DELETE|DETACH|SET|REMOVE|DROP|FOREACH|LOAD\s+CSV|CALL)\b", re.IGNORECASE)
+
+
+def _is_read_query(query: str) -> bool:
+    """Cheaply classify a Cypher query as read-only."""
+    return bool(_READ_QUERY_PREFIX.match(query)) and not _WRITE_CLAUSE.search(query)
+
+
+# Update counters surfaced with capped query results
+_COUNTER_FIELDS = (
+    "nodes_created", "nodes_deleted",
+    "relationships_created", "relationships_deleted",
+    "properties_set", "labels_added", "labels_removed",
+    "indexes_added", "indexes_removed",
+    "constraints_added", "constraints_removed",
+)
+
+
+@lru_cache(maxsize=1024)
+def _build_create_node_query(labels: Tuple[str, ...], property_keys: Tuple[str, ...]) -> str:
+    """Build the CREATE query for a label set and property keyset.
+    
+    Cached so repeated shapes reuse byte-identical Cypher text, which also
+    keeps Neo4j's query plan cache warm.
+    """
+    label_str = ":".join(labels) if labels else ""
+    props_str = ", ".join([f"{k}: ${k}" for k in property_keys])
+    return f"CREATE (n{':' + label_str if label_str else ''} {{{props_str}}}) RETURN n"
+
+
+@lru_cache(maxsize=1024)
+def _build_create_relationship_query(rel_type: str, property_keys: Tuple[str, ...]) -> str:
+    """Build the MATCH/CREATE query for a relationship type and property keyset."""
+    props_str = ", ".join([f"{k}: ${k}" for k in property_keys])
+    props_clause = f"{{{props_str}}}" if property_keys else ""
+    return (
+        "MATCH (a), (b) "
+        "WHERE id(a) = $from_id AND id(b) = $to_id "
+        f"CREATE (a)-[r:{rel_type} {props_clause}]->(b) "
+        "RETURN r"
+    )
 
 
 class Neo4jClient:
-    """Neo4j client wrapper for MCP operations."""
+    """Neo4j client wrapper for MCP operations.
+    
+    One instance per worker process is created by the application lifespan
+    and owns that worker's only driver. Each request borrows a connection
+    from the driver's pool through ``execute_query``, so the pool is sized
+    via settings rather than by creating additional drivers.
+    """
     
     def __init__(self):
-        self.driver: Optional[Driver] = None
-        self._connect()
+        self.driver: Optional[AsyncDriver] = None
+        # Results of read-only queries; any write through this client clears it.
+        # The cache is per worker process, so other workers are not invalidated.
+        self.query_cache = QueryResultCache(settings.query_cache_size, settings.query_cache_ttl)
     
-    def _connect(self):
-        """Establish connection to Neo4j database."""
+    async def connect(self):
+        """Establish connection to Neo4j database.
+        
+        Called from the application lifespan so each worker creates its
+        driver inside its own event loop. An unreachable database is logged
+        rather than raised: the driver reconnects on demand and ``/health``
+        reports the outage.
+        """
+        self.driver = AsyncGraphDatabase.driver(
+            settings.neo4j_uri,
+            auth=(settings.neo4j_user, settings.neo4j_password),
+            max_connection_pool_size=settings.neo4j_pool_size,
+            connection_acquisition_timeout=settings.neo4j_connection_acquisition_timeout,
+            max_connection_lifetime=settings.neo4j_max_connection_lifetime,
+            keep_alive=True
+        )
         try:
-            self.driver = GraphDatabase.driver(
-                settings.neo4j_uri,
-                auth=(settings.neo4j_user, settings.neo4j_password)
-            )
             # Test connection
-            with self.driver.session(database=settings.neo4j_database) as session:
-                session.run("RETURN 1")
+            await self.driver.verify_connectivity()
             logger.info("Successfully connected to Neo4j")
         except Exception as e:
             logger.error(f"Failed to connect to Neo4j: {e}")
-            raise
     
-    def close(self):
+    async def close(self):
         """Close the Neo4j connection."""
         if self.driver:
-            self.driver.close()
+            await self.driver.close()
+            self.driver = None
     
     async def create_node(self, labels: List[str], properties: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new node with given labels and properties."""
         try:
-            with self.driver.session(database=settings.neo4j_database) as session:
-                # Build Cypher query
-                label_str = ":".join(labels) if labels else ""
-                props_str = ", ".join([f"{k}: ${k}" for k in properties.keys()])
-                
-                query = f"CREATE (n{':' + label_str if label_str else ''} {{{props_str}}}) RETURN n"
-                
-                result = session.run(query, properties)
-                node = result.single()["n"]
-                
-                return {
-                    "status": "success",
-                    "node_id": node.id,
-                    "labels": list(node.labels),
-                    "properties": dict(node)
-                }
+            # Build Cypher query
+            query = _build_create_node_query(tuple(labels), tuple(sorted(properties)))
+            
+            records, _, _ = await self.driver.execute_query(
+                query, properties,
+                database_=settings.neo4j_database,
+                routing_=RoutingControl.WRITE
+            )
+            node = records[0]["n"]
+            self.query_cache.clear()
+            
+            return {
+                "status": "success",
+                "node_id": node.id,
+                "labels": list(node.labels),
+                "properties": dict(node)
+            }
         except Exception as e:
             logger.error(f"Error creating node: {e}")
             return {"status": "error", "message": str(e)}
     
     async def run_cypher_query(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Execute a Cypher query and return results."""
+        """Execute a Cypher query and return results.
+        
+        At most ``settings.cypher_max_results`` rows are materialized; the
+        rest are discarded and ``truncated`` is set. Use
+        ``stream_cypher_query`` for unbounded result sets. Results of
+        read-only queries are served from ``query_cache`` while fresh.
+        """
+        limit = settings.cypher_max_results
+        read_only = _is_read_query(query)
+        
+        async def fetch_capped(result: AsyncResult):
+            records = await result.fetch(limit)
+            truncated = await result.peek() is not None
+            summary = await result.consume()
+            return records, truncated, summary
+        
         try:
-            with self.driver.session(database=settings.neo4j_database) as session:
-                result = session.run(query, parameters or {})
-                records = [dict(record) for record in result]
-                
-                return {
-                    "status": "success",
-                    "results": records,
-                    "count": len(records)
-                }
+            if read_only:
+                cache_key = QueryResultCache.make_key(query, parameters)
+                cached = self.query_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+                # A write clearing the cache while this read is in flight
+                # bumps the generation, so the pre-write result is not stored
+                generation = self.query_cache.generation
+            
+            records, truncated, summary = await self.driver.execute_query(
+                query, parameters or {},
+                database_=settings.neo4j_database,
+                routing_=RoutingControl.READ if read_only else RoutingControl.WRITE,
+                result_transformer_=fetch_capped
+            )
+            results = [dict(record) for record in records]
+            
+            response = {
+                "status": "success",
+                "results": results,
+                "count": len(results),
+                "truncated": truncated,
+                "counters": {name: getattr(summary.counters, name) for name in _COUNTER_FIELDS}
+            }
+            if read_only:
+                self.query_cache.set(cache_key, response, generation)
+            else:
+                self.query_cache.clear()
+            return response
         except Exception as e:
             logger.error(f"Error executing Cypher query: {e}")
             return {"status": "error", "message": str(e)}
     
+    async def stream_cypher_query(self, query: str,
+                                  parameters: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Execute a Cypher query and yield records as they arrive from Neo4j."""
+        read_only = _is_read_query(query)
+        access_mode = READ_ACCESS if read_only else WRITE_ACCESS
+        try:
+            async with self.driver.session(database=settings.neo4j_database,
+                                           default_access_mode=access_mode) as session:
+                result = await session.run(query, parameters or {})
+                async for record in result:
+                    yield dict(record)
+        finally:
+            # Invalidate only once the write has finished; clearing earlier
+            # would let a concurrent read re-cache pre-write rows
+            if not read_only:
+                self.query_cache.clear()
+    
     async def create_relationship(self, from_node_id: int, to_node_id: int, 
                                 rel_type: str, properties: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Create a relationship between two nodes."""
         try:
-            with self.driver.session(database=settings.neo4j_database) as session:
-                props_str = ", ".join([f"{k}: ${k}" for k in (properties or {}).keys()])
-                props_clause = f"{{{props_str}}}" if properties else ""
-                
-                query = f"""
-                MATCH (a), (b) 
-                WHERE id(a) = $from_id AND id(b) = $to_id
-                CREATE (a)-[r:{rel_type} {props_clause}]->(b)
-                RETURN r
-                """
-                
-                params = {"from_id": from_node_id, "to_id": to_node_id, **(properties or {})}
-                result = session.run(query, params)
-                relationship = result.single()["r"]
-                
-                return {
-                    "status": "success",
-                    "relationship_id": relationship.id,
-                    "type": relationship.type,
-                    "properties": dict(relationship)
-                }
+            query = _build_create_relationship_query(rel_type, tuple(sorted(properties or {})))
+            
+            params = {"from_id": from_node_id, "to_id": to_node_id, **(properties or {})}
+            records, _, _ = await self.driver.execute_query(
+                query, params,
+                database_=settings.neo4j_database,
+                routing_=RoutingControl.WRITE
+            )
+            relationship = records[0]["r"]
+            self.query_cache.clear()
+            
+            return {
+                "status": "success",
+                "relationship_id": relationship.id,
+                "type": relationship.type,
+                "properties": dict(relationship)
+            }
         except Exception as e:
             logger.error(f"Error creating relationship: {e}")
             return {"status": "error", "message": str(e)}
-
-
-# Global Neo4j client instance
-neo4j_client = Neo4jClient()
@@ -0,0 +1,64 @@
+# mcp/query_cache.py
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import orjson
+
+
+class QueryResultCache:
+    """Bounded LRU cache with a per-entry TTL for read-only query results.
+
+    ``generation`` increases on every ``clear()``. A reader captures it before
+    querying and passes it to ``set()``, so results fetched before a
+    concurrent write's invalidation are never stored.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.generation = 0
+
+    @staticmethod
+    def make_key(query: str, parameters: Optional[Dict[str, Any]] = None) -> Tuple[str, bytes]:
+        """Build a hashable key; parameters are serialized since they may hold lists or dicts."""
+        return query, orjson.dumps(parameters or {}, option=orjson.OPT_SORT_KEYS)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """Store a value, evicting the least recently used entries past maxsize.
+
+        If ``generation`` is given and the cache has been cleared since it was
+        read, the value is stale and is dropped.
+        """
+        if self.maxsize <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> int:
+        """Drop every entry and return how many were removed."""
+        count = len(self._entries)
+        self._entries.clear()
+        self.generation += 1
+        return count
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,18 +1,97 @@
 # mcp/router.py
 
 import logging
-from fastapi import APIRouter, Request, HTTPException
-from mcp.validator import validate_message
-from mcp.neo4j_client import neo4j_client
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import Response, StreamingResponse
+from neo4j.exceptions import ClientError
+from pydantic import TypeAdapter, ValidationError
+from mcp.schema import MCPMessage
+from mcp.neo4j_client import Neo4jClient
 
+import os
+import time
 import uuid
-from datetime import datetime
+from collections import deque
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Response ids are drawn from a per-worker pool refilled from a single
+# os.urandom() call instead of one syscall per uuid4().
+_UUID_POOL_SIZE = 1024
+_uuid_pool = deque()
+
+def _next_uuid() -> str:
+    """Return a random (version 4) UUID string from the per-worker pool."""
+    if not _uuid_pool:
+        entropy = os.urandom(16 * _UUID_POOL_SIZE)
+        _uuid_pool.extend(
+            str(uuid.UUID(bytes=entropy[i:i + 16], version=4))
+            for i in range(0, len(entropy), 16)
+        )
+    return _uuid_pool.popleft()
+
+# The "YYYY-MM-DDTHH:MM:SS" prefix only changes once per second
+_ts_second = -1
+_ts_prefix = ""
+
+def _fast_iso_now() -> str:
+    """Return the current UTC time as ISO 8601 with millisecond precision."""
+    global _ts_second, _ts_prefix
+    second, nanos = divmod(time.time_ns(), 1_000_000_000)
+    if second != _ts_second:
+        _ts_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        _ts_second = second
+    return f"{_ts_prefix}.{nanos // 1_000_000:03d}Z"
+
+# Built once; validates raw request bytes without an intermediate json.loads
+_MCP_ADAPTER = TypeAdapter(MCPMessage)
+
+async def parse_message(request: Request) -> MCPMessage:
+    """Parse and validate the request body as an MCP message.
+    Raises HTTPException(400) if validation fails.
+    """
+    try:
+        return _MCP_ADAPTER.validate_json(await request.body())
+    except ValidationError as e:
+        errors = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" if error["loc"] else error["msg"]
+            for error in e.errors()
+        )
+        raise HTTPException(status_code=400, detail=f"Invalid MCP message: {errors}")
+
+def _json_default(obj):
+    """Serialize values orjson does not know natively (e.g. neo4j graph types)."""
+    return jsonable_encoder(obj)
+
+# Fixed parts of the response envelope, pre-encoded once; only the values
+# spliced between them vary per request. id, timestamp and response_to are
+# ASCII UUID/ISO strings and need no JSON escaping.
+_RESPONSE_ID = b'{"id":"'
+_RESPONSE_TIMESTAMP = b'","timestamp":"'
+_RESPONSE_TO = b'","type":"response","response_to":"'
+_RESPONSE_TARGET = b'","target":'
+_RESPONSE_PAYLOAD = b',"payload":'
+
+def _encode_response(response_to: str, target: str, payload: dict) -> bytes:
+    """Build the JSON response envelope by joining pre-encoded fragments."""
+    return b"".join((
+        _RESPONSE_ID, _next_uuid().encode(),
+        _RESPONSE_TIMESTAMP, _fast_iso_now().encode(),
+        _RESPONSE_TO, response_to.encode(),
+        _RESPONSE_TARGET, orjson.dumps(target),
+        _RESPONSE_PAYLOAD, orjson.dumps(payload, default=_json_default, option=orjson.OPT_NON_STR_KEYS),
+        b"}",
+    ))
+
+async def get_neo4j(request: Request) -> Neo4jClient:
+    """Return the worker's Neo4j client created by the application lifespan."""
+    return request.app.state.neo4j
+
 # Neo4j handlers with actual implementation
-async def handle_neo4j_create_node(payload: dict):
+async def handle_neo4j_create_node(client: Neo4jClient, payload: dict):
     """Handle node creation requests."""
     try:
         labels = payload.get("labels", [])
@@ -21,13 +100,13 @@ async def handle_neo4j_create_node(payload: dict):
         if not properties:
             raise ValueError("Node properties are required")
         
-        result = await neo4j_client.create_node(labels, properties)
+        result = await client.create_node(labels, properties)
         return result
     except Exception as e:
         logger.error(f"Error in create_node handler: {e}")
         return {"status": "error", "message": str(e)}
 
-async def handle_run_cypher_query(payload: dict):
+async def handle_run_cypher_query(client: Neo4jClient, payload: dict):
     """Handle Cypher query execution requests."""
     try:
         query = payload.get("query")
@@ -36,13 +115,13 @@ async def handle_run_cypher_query(payload: dict):
         if not query:
             raise ValueError("Cypher query is required")
         
-        result = await neo4j_client.run_cypher_query(query, parameters)
+        result = await client.run_cypher_query(query, parameters)
         return result
     except Exception as e:
         logger.error(f"Error in run_cypher_query handler: {e}")
         return {"status": "error", "message": str(e)}
 
-async def handle_neo4j_create_relationship(payload: dict):
+async def handle_neo4j_create_relationship(client: Neo4jClient, payload: dict):
     """Handle relationship creation requests."""
     try:
         from_node_id = payload.get("from_node_id")
@@ -53,7 +132,7 @@ async def handle_neo4j_create_relationship(payload: dict):
         if not all([from_node_id, to_node_id, rel_type]):
             raise ValueError("from_node_id, to_node_id, and rel_type are required")
         
-        result = await neo4j_client.create_relationship(
+        result = await client.create_relationship(
             from_node_id, to_node_id, rel_type, properties
         )
         return result
@@ -61,33 +140,72 @@ async def handle_neo4j_create_relationship(payload: dict):
         logger.error(f"Error in create_relationship handler: {e}")
         return {"status": "error", "message": str(e)}
 
-# Map (target, action) to handler functions
+# Map target, then action, to handler functions
 HANDLERS = {
-    ("neo4j", "create_node"): handle_neo4j_create_node,
-    ("neo4j", "run_cypher_query"): handle_run_cypher_query,
-    ("neo4j", "create_relationship"): handle_neo4j_create_relationship,
+    "neo4j": {
+        "create_node": handle_neo4j_create_node,
+        "run_cypher_query": handle_run_cypher_query,
+        "create_relationship": handle_neo4j_create_relationship,
+    },
 }
+_EMPTY = {}
 
 @router.post("/mcp/message")
-async def route_message(request: Request):
-    message = await request.json()
-    # 1. Validate schema
-    validate_message(message)
+async def route_message(message: MCPMessage = Depends(parse_message),
+                        client: Neo4jClient = Depends(get_neo4j)):
+    # 1. Schema is validated while parse_message decodes the body
 
     # 2. Dispatch to handler
-    key = (message["target"], message["action"])
-    handler = HANDLERS.get(key)
+    handler = HANDLERS.get(message.target, _EMPTY).get(message.action)
     if not handler:
-        raise HTTPException(status_code=404, detail=f"No handler for target={key[0]} action={key[1]}")
+        raise HTTPException(status_code=404, detail=f"No handler for target={message.target} action={message.action}")
 
     # 3. Invoke handler and build response
-    result = await handler(message["payload"])
-    response = {
-        "id": str(uuid.uuid4()),
-        "timestamp": datetime.utcnow().isoformat() + "Z",
-        "type": "response",
-        "response_to": message["id"],
-        "target": message["target"],
-        "payload": result,
-    }
-    return response
\ No newline at end of file
+    result = await handler(client, message.payload)
+    body = _encode_response(message.id, message.target, result)
+    return Response(body, media_type="application/json")
+
+@router.delete("/mcp/cache")
+async def clear_query_cache(client: Neo4jClient = Depends(get_neo4j)):
+    """Invalidate cached read-only Cypher query results.
+    
+    Best-effort: each worker process keeps its own cache and only the worker
+    serving this request is cleared. Other workers may return stale reads
+    for up to QUERY_CACHE_TTL seconds.
+    """
+    cleared = client.query_cache.clear()
+    return {"status": "success", "cleared": cleared}
+
+async def _ndjson_lines(first: dict, records):
+    """Encode records as newline-delimited JSON, one row per line."""
+    yield orjson.dumps(first, default=_json_default, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+    async for record in records:
+        yield orjson.dumps(record, default=_json_default, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+
+@router.post("/mcp/stream")
+async def stream_message(message: MCPMessage = Depends(parse_message),
+                         client: Neo4jClient = Depends(get_neo4j)):
+    """Stream run_cypher_query results as NDJSON without materializing them."""
+    if message.target != "neo4j" or message.action != "run_cypher_query":
+        raise HTTPException(status_code=404, detail=f"No stream handler for target={message.target} action={message.action}")
+    
+    query = message.payload.get("query")
+    if not query:
+        raise HTTPException(status_code=400, detail="Cypher query is required")
+    
+    records = client.stream_cypher_query(query, message.payload.get("parameters", {}))
+    # Pull the first row before committing to a 200 so connection and
+    # query errors still produce a proper error response: bad Cypher or
+    # parameters are the caller's fault (400), anything else is upstream (502).
+    try:
+        first = await anext(records)
+    except StopAsyncIteration:
+        return StreamingResponse(iter(()), media_type="application/x-ndjson")
+    except (ClientError, TypeError) as e:
+        logger.error(f"Invalid Cypher query for stream: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error streaming Cypher query: {e}")
+        raise HTTPException(status_code=502, detail=str(e))
+    
+    return StreamingResponse(_ndjson_lines(first, records), media_type="application/x-ndjson")
\ No newline at end of file
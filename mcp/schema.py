@@ -1,41 +1,25 @@
 # mcp/schema.py
 
-MCP_JSON_SCHEMA = {
-    "$schema": "http://json-schema.org/draft-07/schema#",
-    "title": "MCP Message",
-    "type": "object",
-    "required": ["id", "timestamp", "type", "action", "target", "payload"],
-    "properties": {
-        "id": {
-            "type": "string",
-            "format": "uuid",
-            "description": "Unique message identifier"
-        },
-        "timestamp": {
-            "type": "string",
-            "format": "date-time",
-            "description": "ISO 8601 timestamp"
-        },
-        "type": {
-            "type": "string",
-            "enum": ["request", "response"]
-        },
-        "action": {
-            "type": "string"
-        },
-        "target": {
-            "type": "string"
-        },
-        "payload": {
-            "type": "object"
-        },
-        "response_to": {
-            "type": "string",
-            "format": "uuid"
-        },
-        "metadata": {
-            "type": "object",
-            "additionalProperties": True
-        }
-    }
-}
\ No newline at end of file
+from datetime import datetime
+from typing import Annotated, Any, Dict, Literal, Optional
+from pydantic import BaseModel, StringConstraints
+
+# UUIDs are checked by pattern but kept as the client's exact string, so
+# responses echo the id back unchanged (no case or format normalization)
+UUIDString = Annotated[
+    str,
+    StringConstraints(pattern=r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"),
+]
+
+
+class MCPMessage(BaseModel):
+    """MCP message envelope; the JSON Schema in the README describes the same shape."""
+    
+    id: UUIDString
+    timestamp: datetime
+    type: Literal["request", "response"]
+    action: str
+    target: str
+    payload: Dict[str, Any]
+    response_to: Optional[UUIDString] = None
+    metadata: Optional[Dict[str, Any]] = None
@@ -0,0 +1,214 @@
+# tests/test_neo4j_client.py
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+from mcp import neo4j_client as neo4j_client_module
+from mcp.neo4j_client import Neo4jClient, _COUNTER_FIELDS
+
+
+class StubResult:
+    """Minimal stand-in for neo4j.AsyncResult used by result transformers."""
+    
+    def __init__(self, rows, counters):
+        self._rows = list(rows)
+        self._counters = counters
+    
+    async def fetch(self, n):
+        fetched, self._rows = self._rows[:n], self._rows[n:]
+        return fetched
+    
+    async def peek(self):
+        return self._rows[0] if self._rows else None
+    
+    async def consume(self):
+        counters = {name: 0 for name in _COUNTER_FIELDS}
+        counters.update(self._counters)
+        return SimpleNamespace(counters=SimpleNamespace(**counters))
+
+
+class StubDriver:
+    """Records execute_query calls and answers them with fixed rows."""
+    
+    def __init__(self, rows=(), **counters):
+        self.rows = rows
+        self.counters = counters
+        self.queries = []
+    
+    async def execute_query(self, query, parameters=None, result_transformer_=None, **kwargs):
+        self.queries.append(query)
+        result = StubResult(self.rows, self.counters)
+        if result_transformer_ is not None:
+            return await result_transformer_(result)
+        return list(self.rows), None, None
+
+
+def make_client(driver):
+    client = Neo4jClient()
+    client.driver = driver
+    return client
+
+
+@pytest.mark.asyncio
+class TestRunCypherQuery:
+    """Test cases for materialized Cypher query results."""
+    
+    async def test_results_capped_at_max_results(self, monkeypatch):
+        """Test that rows beyond cypher_max_results are dropped and flagged."""
+        monkeypatch.setattr(neo4j_client_module.settings, "cypher_max_results", 2)
+        client = make_client(StubDriver(rows=[{"i": i} for i in range(5)]))
+    
+        result = await client.run_cypher_query("MATCH (n) RETURN n")
+    
+        assert result["status"] == "success"
+        assert result["results"] == [{"i": 0}, {"i": 1}]
+        assert result["count"] == 2
+        assert result["truncated"] is True
+    
+    async def test_results_under_cap_not_truncated(self, monkeypatch):
+        """Test that a result within the cap is returned whole."""
+        monkeypatch.setattr(neo4j_client_module.settings, "cypher_max_results", 10)
+        client = make_client(StubDriver(rows=[{"i": 0}, {"i": 1}]))
+    
+        result = await client.run_cypher_query("MATCH (n) RETURN n")
+    
+        assert result["count"] == 2
+        assert result["truncated"] is False
+    
+    async def test_counters_reported(self):
+        """Test that summary update counters are surfaced with the rows."""
+        client = make_client(StubDriver(nodes_created=3, properties_set=6))
+    
+        result = await client.run_cypher_query("CREATE (n:Person) RETURN n")
+    
+        assert set(result["counters"]) == set(_COUNTER_FIELDS)
+        assert result["counters"]["nodes_created"] == 3
+        assert result["counters"]["properties_set"] == 6
+        assert result["counters"]["nodes_deleted"] == 0
+
+
+class StubEntity(dict):
+    """Node/relationship stand-in: properties as dict items plus attributes."""
+    
+    def __init__(self, properties, **attributes):
+        super().__init__(properties)
+        self.__dict__.update(attributes)
+
+
+@pytest.mark.asyncio
+class TestQueryCacheIntegration:
+    """Test cases for the read cache as used by Neo4jClient."""
+    
+    async def test_repeated_read_served_from_cache(self):
+        """Test that a repeated read-only query does not reach the driver."""
+        driver = StubDriver(rows=[{"i": 1}])
+        client = make_client(driver)
+    
+        first = await client.run_cypher_query("MATCH (n) RETURN n", {"a": 1})
+        second = await client.run_cypher_query("MATCH (n) RETURN n", {"a": 1})
+    
+        assert second == first
+        assert len(driver.queries) == 1
+    
+    async def test_different_parameters_not_shared(self):
+        """Test that the cache key includes the query parameters."""
+        driver = StubDriver(rows=[{"i": 1}])
+        client = make_client(driver)
+    
+        await client.run_cypher_query("MATCH (n) RETURN n", {"a": 1})
+        await client.run_cypher_query("MATCH (n) RETURN n", {"a": 2})
+    
+        assert len(driver.queries) == 2
+    
+    async def test_write_query_skips_and_clears_cache(self):
+        """Test that a non-read query is never cached and invalidates reads."""
+        driver = StubDriver(rows=[{"i": 1}])
+        client = make_client(driver)
+        await client.run_cypher_query("MATCH (n) RETURN n")
+        assert len(client.query_cache) == 1
+    
+        await client.run_cypher_query("MATCH (n) SET n.seen = true")
+        await client.run_cypher_query("MATCH (n) SET n.seen = true")
+    
+        assert len(client.query_cache) == 0
+        assert len(driver.queries) == 3
+    
+    async def test_create_node_clears_cache(self):
+        """Test that creating a node invalidates cached reads."""
+        node = StubEntity({"name": "John Doe"}, id=1, labels={"Person"})
+        client = make_client(StubDriver(rows=[{"n": node}]))
+        client.query_cache.set(client.query_cache.make_key("MATCH (n) RETURN n"), {"status": "success"})
+    
+        result = await client.create_node(["Person"], {"name": "John Doe"})
+    
+        assert result["status"] == "success"
+        assert len(client.query_cache) == 0
+    
+    async def test_create_relationship_clears_cache(self):
+        """Test that creating a relationship invalidates cached reads."""
+        relationship = StubEntity({}, id=7, type="KNOWS")
+        client = make_client(StubDriver(rows=[{"r": relationship}]))
+        client.query_cache.set(client.query_cache.make_key("MATCH (n) RETURN n"), {"status": "success"})
+    
+        result = await client.create_relationship(1, 2, "KNOWS")
+    
+        assert result["status"] == "success"
+        assert len(client.query_cache) == 0
+    
+    async def test_read_overlapping_write_not_cached(self):
+        """Test that a read started before a concurrent write does not cache pre-write rows."""
+        node = StubEntity({"name": "John Doe"}, id=1, labels={"Person"})
+        
+        class GatedDriver(StubDriver):
+            """Holds reads (result transformer calls) until the gate opens."""
+            
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.gate = asyncio.Event()
+            
+            async def execute_query(self, query, parameters=None, result_transformer_=None, **kwargs):
+                if result_transformer_ is not None:
+                    await self.gate.wait()
+                return await super().execute_query(query, parameters, result_transformer_, **kwargs)
+        
+        driver = GatedDriver(rows=[{"n": node}])
+        client = make_client(driver)
+        
+        read = asyncio.create_task(client.run_cypher_query("MATCH (n) RETURN n"))
+        await asyncio.sleep(0)
+        await client.create_node(["Person"], {"name": "John Doe"})
+        driver.gate.set()
+        await read
+        
+        assert len(client.query_cache) == 0
+        await client.run_cypher_query("MATCH (n) RETURN n")
+        assert driver.queries.count("MATCH (n) RETURN n") == 2
+    
+    async def test_streamed_write_clears_cache_after_completion(self):
+        """Test that a streamed write invalidates the cache only once it has finished."""
+        class StubSession:
+            async def __aenter__(self):
+                return self
+            
+            async def __aexit__(self, *exc_info):
+                return False
+            
+            async def run(self, query, parameters=None):
+                async def records():
+                    for i in range(2):
+                        yield {"i": i}
+                return records()
+        
+        class SessionDriver:
+            def session(self, **kwargs):
+                return StubSession()
+        
+        client = make_client(SessionDriver())
+        client.query_cache.set(client.query_cache.make_key("MATCH (n) RETURN n"), {"status": "success"})
+        
+        stream = client.stream_cypher_query("MATCH (n) SET n.seen = true RETURN n")
+        assert await stream.__anext__() == {"i": 0}
+        assert len(client.query_cache) == 1
+        
+        assert [record async for record in stream] == [{"i": 1}]
+        assert len(client.query_cache) == 0
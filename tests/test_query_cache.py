@@ -0,0 +1,59 @@
+# tests/test_query_cache.py
+
+import time
+from mcp.query_cache import QueryResultCache
+
+
+class TestQueryResultCache:
+    """Test cases for the read-only query result cache."""
+    
+    def test_hit_after_set(self):
+        """Test that a stored result is returned for the same query and parameters."""
+        cache = QueryResultCache(maxsize=4, ttl=30)
+        key = QueryResultCache.make_key("MATCH (n) RETURN n", {"b": 1, "a": [1, 2]})
+        cache.set(key, {"status": "success"})
+        
+        same_key = QueryResultCache.make_key("MATCH (n) RETURN n", {"a": [1, 2], "b": 1})
+        assert cache.get(same_key) == {"status": "success"}
+    
+    def test_expired_entry_is_dropped(self):
+        """Test that entries are not served past their TTL."""
+        cache = QueryResultCache(maxsize=4, ttl=0.01)
+        key = QueryResultCache.make_key("RETURN 1")
+        cache.set(key, {"status": "success"})
+        time.sleep(0.02)
+        
+        assert cache.get(key) is None
+        assert len(cache) == 0
+    
+    def test_least_recently_used_is_evicted(self):
+        """Test LRU eviction once maxsize is exceeded."""
+        cache = QueryResultCache(maxsize=2, ttl=30)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+    
+    def test_clear(self):
+        """Test that clear empties the cache and reports the count."""
+        cache = QueryResultCache(maxsize=4, ttl=30)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        
+        assert cache.clear() == 2
+        assert cache.get("a") is None
+    
+    def test_set_dropped_after_clear(self):
+        """Test that a value read before a clear is not stored after it."""
+        cache = QueryResultCache(maxsize=4, ttl=30)
+        generation = cache.generation
+        cache.clear()
+        cache.set("a", 1, generation)
+        
+        assert cache.get("a") is None
+        cache.set("a", 1, cache.generation)
+        assert cache.get("a") == 1
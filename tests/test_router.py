@@ -1,18 +1,66 @@
 # tests/test_router.py
 
+import asyncio
+import json
+import time
 import pytest
+import pytest_asyncio
 import uuid
 from datetime import datetime
-from fastapi.testclient import TestClient
-from main import app
+from httpx import ASGITransport, AsyncClient
+from neo4j.exceptions import ClientError, ServiceUnavailable
+from main import app, fastapi_app, settings
+from mcp.neo4j_client import Neo4jClient
+from mcp.router import get_neo4j
 
-client = TestClient(app)
+
+@pytest_asyncio.fixture
+async def client():
+    """Async client driving the ASGI app in-process on the test event loop.
+    
+    Lifespan is not run here, so handlers get a client with no driver unless
+    a test overrides get_neo4j itself. Overrides are cleared on teardown.
+    """
+    fastapi_app.dependency_overrides[get_neo4j] = Neo4jClient
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+    finally:
+        fastapi_app.dependency_overrides.clear()
+
+
+class StubStreamClient(Neo4jClient):
+    """Neo4j client whose stream yields fixed rows, or raises, without a driver."""
+    
+    def __init__(self, rows, error=None):
+        super().__init__()
+        self.rows = rows
+        self.error = error
+    
+    async def stream_cypher_query(self, query, parameters=None):
+        if self.error is not None:
+            raise self.error
+        for row in self.rows:
+            yield row
 
 
+def cypher_message(query="MATCH (n) RETURN n"):
+    """Build a valid run_cypher_query MCP request."""
+    return {
+        "id": str(uuid.uuid4()),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "type": "request",
+        "action": "run_cypher_query",
+        "target": "neo4j",
+        "payload": {"query": query}
+    }
+
+
+@pytest.mark.asyncio
 class TestMCPRouter:
     """Test cases for MCP router functionality."""
     
-    def test_valid_create_node_message(self):
+    async def test_valid_create_node_message(self, client):
         """Test creating a node with valid MCP message."""
         message = {
             "id": str(uuid.uuid4()),
@@ -26,7 +74,7 @@ class TestMCPRouter:
             }
         }
         
-        response = client.post("/api/v1/mcp/message", json=message)
+        response = await client.post("/api/v1/mcp/message", json=message)
         assert response.status_code == 200
         
         data = response.json()
@@ -34,7 +82,7 @@ class TestMCPRouter:
         assert data["response_to"] == message["id"]
         assert "payload" in data
     
-    def test_valid_cypher_query_message(self):
+    async def test_valid_cypher_query_message(self, client):
         """Test executing Cypher query with valid MCP message."""
         message = {
             "id": str(uuid.uuid4()),
@@ -48,14 +96,114 @@ class TestMCPRouter:
             }
         }
         
-        response = client.post("/api/v1/mcp/message", json=message)
+        response = await client.post("/api/v1/mcp/message", json=message)
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert data["type"] == "response"
+        assert data["response_to"] == message["id"]
+    
+    async def test_response_envelope_fields(self, client):
+        """Test that responses carry a fresh UUID and a UTC timestamp."""
+        message = {
+            "id": str(uuid.uuid4()),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "type": "request",
+            "action": "run_cypher_query",
+            "target": "neo4j",
+            "payload": {"query": "RETURN 1"}
+        }
+        
+        first = (await client.post("/api/v1/mcp/message", json=message)).json()
+        second = (await client.post("/api/v1/mcp/message", json=message)).json()
+        
+        assert uuid.UUID(first["id"]).version == 4
+        assert first["id"] != second["id"]
+        assert first["timestamp"].endswith("Z")
+        datetime.fromisoformat(first["timestamp"].replace("Z", "+00:00"))
+    
+    async def test_response_echoes_request_id_verbatim(self, client):
+        """Test that response_to is the client's id string, not a normalized UUID."""
+        message = cypher_message()
+        message["id"] = str(uuid.uuid4()).upper()
+        
+        response = await client.post("/api/v1/mcp/message", json=message)
+        assert response.status_code == 200
+        assert response.json()["response_to"] == message["id"]
+    
+    async def test_response_envelope_shape(self, client):
+        """Test that the pre-encoded envelope is valid JSON with the expected fields."""
+        message = {
+            "id": str(uuid.uuid4()),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "type": "request",
+            "action": "create_node",
+            "target": "neo4j",
+            "payload": {"labels": ["Person"], "properties": {"name": "John Doe"}}
+        }
+        
+        response = await client.post("/api/v1/mcp/message", json=message)
         assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
         
         data = response.json()
+        assert list(data) == ["id", "timestamp", "type", "response_to", "target", "payload"]
         assert data["type"] == "response"
         assert data["response_to"] == message["id"]
+        assert data["target"] == "neo4j"
+        assert isinstance(data["payload"], dict)
+    
+    async def test_large_response_gzip_compressed(self, client):
+        """Test that responses above gzip_minimum_size are gzip-encoded."""
+        rows = [{"name": f"Person {i}", "age": i} for i in range(200)]
+        
+        class BulkNeo4jClient(Neo4jClient):
+            async def run_cypher_query(self, query, parameters=None):
+                return {"status": "success", "results": rows, "count": len(rows)}
+        
+        fastapi_app.dependency_overrides[get_neo4j] = BulkNeo4jClient
+        response = await client.post(
+            "/api/v1/mcp/message", json=cypher_message(), headers={"Accept-Encoding": "gzip"}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.content) > settings.gzip_minimum_size
+        assert response.json()["payload"]["results"] == rows
+    
+    async def test_concurrent_requests_overlap(self, client):
+        """Test that in-flight Neo4j calls overlap instead of serializing."""
+        class SlowNeo4jClient(Neo4jClient):
+            async def run_cypher_query(self, query, parameters=None):
+                await asyncio.sleep(0.05)
+                return {"status": "success", "results": [], "count": 0}
+        
+        slow_client = SlowNeo4jClient()
+        messages = [
+            {
+                "id": str(uuid.uuid4()),
+                "timestamp": datetime.utcnow().isoformat() + "Z",
+                "type": "request",
+                "action": "run_cypher_query",
+                "target": "neo4j",
+                "payload": {"query": "MATCH (n) RETURN n LIMIT 5"}
+            }
+            for _ in range(100)
+        ]
+        
+        fastapi_app.dependency_overrides[get_neo4j] = lambda: slow_client
+        start = time.monotonic()
+        responses = await asyncio.gather(
+            *(client.post("/api/v1/mcp/message", json=message) for message in messages)
+        )
+        elapsed = time.monotonic() - start
+        
+        assert all(response.status_code == 200 for response in responses)
+        assert {response.json()["response_to"] for response in responses} == {m["id"] for m in messages}
+        # Serialized, 100 calls of 50ms would take at least 5s
+        assert elapsed < 2.5
     
-    def test_invalid_message_schema(self):
+    async def test_invalid_message_schema(self, client):
         """Test handling of invalid message schema."""
         invalid_message = {
             "id": "not-a-uuid",
@@ -66,10 +214,10 @@ class TestMCPRouter:
             "payload": {}
         }
         
-        response = client.post("/api/v1/mcp/message", json=invalid_message)
+        response = await client.post("/api/v1/mcp/message", json=invalid_message)
         assert response.status_code == 400
     
-    def test_unknown_handler(self):
+    async def test_unknown_handler(self, client):
         """Test handling of unknown target/action combination."""
         message = {
             "id": str(uuid.uuid4()),
@@ -80,10 +228,10 @@ class TestMCPRouter:
             "payload": {}
         }
         
-        response = client.post("/api/v1/mcp/message", json=message)
+        response = await client.post("/api/v1/mcp/message", json=message)
         assert response.status_code == 404
     
-    def test_missing_required_fields(self):
+    async def test_missing_required_fields(self, client):
         """Test handling of missing required fields."""
         incomplete_message = {
             "id": str(uuid.uuid4()),
@@ -93,25 +241,118 @@ class TestMCPRouter:
             # Missing target and payload
         }
         
-        response = client.post("/api/v1/mcp/message", json=incomplete_message)
+        response = await client.post("/api/v1/mcp/message", json=incomplete_message)
+        assert response.status_code == 400
+
+    
+    async def test_stream_unknown_handler(self, client):
+        """Test that only Cypher queries can be streamed."""
+        message = {
+            "id": str(uuid.uuid4()),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "type": "request",
+            "action": "create_node",
+            "target": "neo4j",
+            "payload": {"properties": {"name": "John Doe"}}
+        }
+        
+        response = await client.post("/api/v1/mcp/stream", json=message)
+        assert response.status_code == 404
+    
+    async def test_stream_missing_query(self, client):
+        """Test streaming without a Cypher query."""
+        message = {
+            "id": str(uuid.uuid4()),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "type": "request",
+            "action": "run_cypher_query",
+            "target": "neo4j",
+            "payload": {}
+        }
+        
+        response = await client.post("/api/v1/mcp/stream", json=message)
+        assert response.status_code == 400
+    
+    async def test_stream_ndjson_rows(self, client):
+        """Test that streamed results are one JSON object per line."""
+        rows = [{"name": "John Doe", "age": 30}, {"name": "Jane Doe", "age": None}]
+        fastapi_app.dependency_overrides[get_neo4j] = lambda: StubStreamClient(rows)
+        
+        response = await client.post("/api/v1/mcp/stream", json=cypher_message())
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        
+        lines = response.text.splitlines()
+        assert [json.loads(line) for line in lines] == rows
+        assert response.text.endswith("\n")
+    
+    async def test_stream_empty_result(self, client):
+        """Test that a query with no rows streams an empty 200 body."""
+        fastapi_app.dependency_overrides[get_neo4j] = lambda: StubStreamClient([])
+        
+        response = await client.post("/api/v1/mcp/stream", json=cypher_message())
+        assert response.status_code == 200
+        assert response.text == ""
+    
+    async def test_stream_invalid_cypher_is_client_error(self, client):
+        """Test that Cypher syntax/parameter errors from Neo4j map to 400."""
+        error = ClientError("Invalid input 'MATC'")
+        fastapi_app.dependency_overrides[get_neo4j] = lambda: StubStreamClient([], error)
+        
+        response = await client.post("/api/v1/mcp/stream", json=cypher_message("MATC (n) RETURN n"))
         assert response.status_code == 400
+    
+    async def test_stream_non_string_query_is_client_error(self, client):
+        """Test that a non-string query is rejected with 400."""
+        response = await client.post("/api/v1/mcp/stream", json=cypher_message(123))
+        assert response.status_code == 400
+    
+    async def test_stream_unreachable_neo4j_is_bad_gateway(self, client):
+        """Test that connectivity failures map to 502."""
+        error = ServiceUnavailable("Couldn't connect to localhost:7687")
+        fastapi_app.dependency_overrides[get_neo4j] = lambda: StubStreamClient([], error)
+        
+        response = await client.post("/api/v1/mcp/stream", json=cypher_message())
+        assert response.status_code == 502
+
+    
+    async def test_clear_query_cache(self, client):
+        """Test invalidating the read-only query cache."""
+        response = await client.delete("/api/v1/mcp/cache")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "success"
+        assert "cleared" in data
 
 
+@pytest.mark.asyncio
 class TestHealthEndpoints:
     """Test cases for health check endpoints."""
     
-    def test_root_endpoint(self):
+    async def test_root_endpoint(self, client):
         """Test the root endpoint."""
-        response = client.get("/")
+        response = await client.get("/")
         assert response.status_code == 200
         data = response.json()
         assert "message" in data
         assert "status" in data
     
-    def test_health_endpoint(self):
+    async def test_health_endpoint(self, client):
         """Test the health check endpoint."""
-        response = client.get("/health")
+        response = await client.get("/health")
         assert response.status_code == 200
         data = response.json()
         assert "status" in data
         assert "neo4j" in data
+    
+    async def test_health_endpoint_not_compressed(self, client):
+        """Test that health probes bypass the compression middleware."""
+        response = await client.get("/health", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+    
+    async def test_health_endpoint_rejects_non_get(self, client):
+        """Test that health probes only accept GET."""
+        response = await client.post("/health")
+        assert response.status_code == 405
+        assert response.headers["allow"] == "GET"